@@ -3,11 +3,362 @@
 Cache module
 """
 
+import asyncio
+import inspect
+import msgpack
+import operator
+import os
 import redis
-import uuid
-from typing import Union, Callable, Optional
+import sys
+import threading
+import redis.asyncio as aioredis
+from typing import Union, Callable, List, Optional, Tuple
 from functools import wraps
 
+_REDIS_SOCKET = os.environ.get("REDIS_SOCKET")
+
+if _REDIS_SOCKET:
+    _REDIS_URL = f"unix://{_REDIS_SOCKET}"
+    _POOL = redis.BlockingConnectionPool.from_url(
+        _REDIS_URL, max_connections=16, timeout=5
+    )
+else:
+    _REDIS_URL = "redis://localhost"
+    _POOL = redis.BlockingConnectionPool(
+        host="localhost", socket_keepalive=True, max_connections=16,
+        timeout=5
+    )
+
+_ASYNC_POOL = aioredis.BlockingConnectionPool.from_url(
+    _REDIS_URL, max_connections=20, timeout=5,
+    socket_timeout=2, socket_connect_timeout=1
+)
+
+_STORE_SCRIPT = """
+for i = 4, #KEYS do
+    if redis.call('EXISTS', KEYS[i]) == 1 then
+        return false
+    end
+end
+for i = 4, #KEYS do
+    local j = (i - 4) * 3
+    redis.call('SET', KEYS[i], ARGV[j + 1])
+    redis.call('INCR', KEYS[1])
+    redis.call('RPUSH', KEYS[2], ARGV[j + 2])
+    redis.call('RPUSH', KEYS[3], ARGV[j + 3])
+end
+return #KEYS - 3
+"""
+
+_REPLAY_CHUNK = 1000
+
+_DECODE_UTF8 = operator.methodcaller("decode", "utf-8")
+
+
+def _identity(value):
+    """
+    Returns value unchanged, the default conversion of Cache.get.
+    """
+    return value
+
+
+_TUPLE_EXT = 1
+
+_TEXT_EXT = 2
+
+
+class _Verbatim(str):
+    """
+    A str whose repr is the text itself, for replayed objects.
+    """
+    __repr__ = str.__str__
+
+
+def _pack_default(value) -> msgpack.ExtType:
+    """
+    Encodes the values msgpack has no exact type for.
+
+    Args:
+        value: A tuple or an object msgpack cannot serialize.
+
+    Returns:
+        msgpack.ExtType: Tuples keep their items, other objects
+        are recorded by their str().
+    """
+    if isinstance(value, tuple):
+        return msgpack.ExtType(_TUPLE_EXT, _pack(list(value)))
+    return msgpack.ExtType(_TEXT_EXT, str(value).encode("utf-8"))
+
+
+def _unpack_ext(code: int, data: bytes):
+    """
+    Decodes the extension types written by _pack_default.
+    """
+    if code == _TUPLE_EXT:
+        return tuple(_unpack(data))
+    if code == _TEXT_EXT:
+        return _Verbatim(data.decode("utf-8"))
+    return msgpack.ExtType(code, data)
+
+
+def _pack(value) -> bytes:
+    """
+    Serializes a call history entry with msgpack.
+
+    Args:
+        value: The arguments tuple or return value to serialize.
+
+    Returns:
+        bytes: The packed value.
+    """
+    return msgpack.packb(
+        value, use_bin_type=True, strict_types=True, default=_pack_default
+    )
+
+
+def _unpack(data: bytes):
+    """
+    Deserializes a call history entry.
+
+    Args:
+        data (bytes): An entry written by _pack, or a str() repr
+            pushed by earlier versions of this module.
+
+    Returns:
+        The unpacked value; legacy entries come back as their text.
+    """
+    try:
+        return msgpack.unpackb(data, raw=False, ext_hook=_unpack_ext)
+    except ValueError:
+        return _Verbatim(data.decode("utf-8", "replace"))
+
+
+class _ClockCache:
+    """
+    A bounded in-process cache evicting entries with the CLOCK algorithm.
+
+    Readers read generation() before their Redis round-trip and pass it
+    to put(); any discard() or clear() in between bumps the generation,
+    so a value fetched before the invalidation is dropped.
+
+    Attributes:
+        _capacity (int): Maximum number of entries, 0 disables caching.
+        _keys (List[bytes]): The key held in each slot.
+        _ref (List[bool]): The second-chance bit of each slot.
+        _slots (dict): Maps each cached key to its slot.
+        _values (dict): Maps each cached key to its value.
+        _hand (int): The slot the clock hand points at.
+        _generation (int): Bumped by every discard and clear.
+        _lock (threading.Lock): Guards every access to the entries.
+    """
+    def __init__(self, capacity: int):
+        """
+        Initializes an empty cache.
+
+        Args:
+            capacity (int): Maximum number of entries.
+        """
+        self._capacity = capacity
+        self._keys = []
+        self._ref = []
+        self._slots = {}
+        self._values = {}
+        self._hand = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        """
+        Returns the current invalidation generation.
+        """
+        with self._lock:
+            return self._generation
+
+    def get(self, key: Union[str, bytes]) -> Optional[bytes]:
+        """
+        Retrieves a cached value and sets its reference bit.
+
+        Args:
+            key (Union[str, bytes]): The Redis key of the value.
+
+        Returns:
+            Optional[bytes]: The cached value or None on a miss.
+        """
+        if not self._capacity:
+            return None
+        if isinstance(key, str):
+            key = key.encode()
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                return None
+            self._ref[slot] = True
+            return self._values[key]
+
+    def put(
+            self, key: Union[str, bytes], value: bytes, generation: int
+            ) -> None:
+        """
+        Caches a value, evicting the first slot of the clock hand
+        scan whose reference bit is clear when the cache is full.
+
+        Args:
+            key (Union[str, bytes]): The Redis key of the value.
+            value (bytes): The value to cache.
+            generation (int): The generation read before the value was
+                written to Redis; the value is dropped if it is stale.
+        """
+        if isinstance(key, str):
+            key = key.encode()
+        with self._lock:
+            if not self._capacity or generation != self._generation:
+                return
+            if key not in self._slots:
+                if len(self._keys) < self._capacity:
+                    self._slots[key] = len(self._keys)
+                    self._keys.append(key)
+                    self._ref.append(False)
+                else:
+                    while self._ref[self._hand]:
+                        self._ref[self._hand] = False
+                        self._hand = (self._hand + 1) % self._capacity
+                    evicted = self._keys[self._hand]
+                    del self._slots[evicted]
+                    del self._values[evicted]
+                    self._keys[self._hand] = key
+                    self._slots[key] = self._hand
+                    self._hand = (self._hand + 1) % self._capacity
+            self._values[key] = value
+
+    def discard(self, key: Union[str, bytes]) -> None:
+        """
+        Drops a cached value; its slot is reclaimed by the next put.
+
+        Args:
+            key (Union[str, bytes]): The Redis key of the value.
+        """
+        if isinstance(key, str):
+            key = key.encode()
+        with self._lock:
+            self._generation += 1
+            slot = self._slots.pop(key, None)
+            if slot is None:
+                return
+            del self._values[key]
+            last, last_ref = self._keys.pop(), self._ref.pop()
+            if last != key:
+                self._keys[slot] = last
+                self._ref[slot] = last_ref
+                self._slots[last] = slot
+            self._hand = self._hand % len(self._keys) if self._keys else 0
+
+    def clear(self) -> None:
+        """
+        Drops every cached value.
+        """
+        with self._lock:
+            self._generation += 1
+            self._keys.clear()
+            self._ref.clear()
+            self._slots.clear()
+            self._values.clear()
+            self._hand = 0
+
+
+_L1 = _ClockCache(1024)
+
+_NO_L1 = _ClockCache(0)
+
+
+def _history_keys(qualname: str) -> Tuple[bytes, bytes, bytes]:
+    """
+    Builds the call counter and history list keys of a method.
+
+    Args:
+        qualname (str): The qualified name of the method.
+
+    Returns:
+        Tuple[bytes, bytes, bytes]: The counter, inputs and outputs keys.
+    """
+    return (
+        qualname.encode(),
+        f"{qualname}:inputs".encode(),
+        f"{qualname}:outputs".encode()
+    )
+
+
+def _queue_window(pipe, inputs_key: bytes, outputs_key: bytes, start: int):
+    """
+    Queues the LRANGEs of one replay window of the history lists.
+
+    Args:
+        pipe: The sync or async pipeline to queue the commands on.
+        inputs_key (bytes): The key of the inputs list.
+        outputs_key (bytes): The key of the outputs list.
+        start (int): The index of the first entry of the window.
+    """
+    end = start + _REPLAY_CHUNK - 1
+    pipe.lrange(inputs_key, start, end)
+    pipe.lrange(outputs_key, start, end)
+
+
+def _format_window(
+        qualname: str, inputs: List[bytes], outputs: List[bytes]
+        ) -> str:
+    """
+    Formats one replay window of msgpack-encoded history entries.
+
+    Args:
+        qualname (str): The qualified name of the replayed method.
+        inputs (List[bytes]): The packed argument tuples.
+        outputs (List[bytes]): The packed return values.
+
+    Returns:
+        str: One newline-terminated line per call.
+    """
+    lines = []
+    for inp, out in zip(inputs, outputs):
+        inp_args, out_val = _unpack(inp), _unpack(out)
+        lines.append(f"{qualname}(*{inp_args}) -> {out_val}\n")
+    return "".join(lines)
+
+
+def _draw_keys(count: int) -> List[str]:
+    """
+    Generates distinct random keys for a batch of stores.
+
+    Args:
+        count (int): The number of keys to generate.
+
+    Returns:
+        List[str]: The generated keys.
+    """
+    keys = set()
+    while len(keys) < count:
+        keys.add(os.urandom(8).hex())
+    return list(keys)
+
+
+def _script_params(
+        history_keys: Tuple[bytes, bytes, bytes], keys: List[str], items
+        ) -> Tuple[list, list]:
+    """
+    Builds the KEYS and ARGV of one store script call.
+
+    Args:
+        history_keys (Tuple[bytes, bytes, bytes]): The counter, inputs
+            and outputs keys of the store method.
+        keys (List[str]): The keys to store the items under.
+        items (List[Union[str, bytes, int, float]]): The data to store.
+
+    Returns:
+        Tuple[list, list]: The script keys and arguments.
+    """
+    args = []
+    for key, data in zip(keys, items):
+        args.extend((data, _pack((data,)), _pack(key)))
+    return [*history_keys, *keys], args
+
 
 def count_calls(method: Callable) -> Callable:
     """
@@ -19,10 +370,11 @@ def count_calls(method: Callable) -> Callable:
     Returns:
         Callable: The wrapped method with call counting.
     """
+    counter_key = _history_keys(method.__qualname__)[0]
+
     @wraps(method)
     def wrapper(self, *args, **kwargs):
-        key = method.__qualname__
-        self._redis.incr(key)
+        self._redis.incr(counter_key)
         return method(self, *args, **kwargs)
     return wrapper
 
@@ -38,67 +390,166 @@ def call_history(method: Callable) -> Callable:
     Returns:
         Callable: The wrapped method with call history logging.
     """
+    _, inputs_key, outputs_key = _history_keys(method.__qualname__)
+
     @wraps(method)
     def wrapper(self, *args, **kwargs):
-        inputs_key = f"{method.__qualname__}:inputs"
-        outputs_key = f"{method.__qualname__}:outputs"
-        self._redis.rpush(inputs_key, str(args))
+        self._redis.rpush(inputs_key, _pack(args))
         output = method(self, *args, **kwargs)
-        self._redis.rpush(outputs_key, str(output))
+        self._redis.rpush(outputs_key, _pack(output))
         return output
     return wrapper
 
 
+def instrumented_store(method: Callable) -> Callable:
+    """
+    Decorator fusing count_calls and call_history for a store method.
+
+    The decorated method only generates the key; the wrapper runs the
+    instance's store script, which performs the SET of the data, the
+    call counter INCR and both history RPUSHes atomically in a single
+    round-trip. If the key already exists nothing is written and a new
+    key is drawn. The call counter is then dropped from the read cache.
+    Coroutine methods get an async wrapper awaiting it.
+
+    Args:
+        method (Callable): The store method to be decorated.
+
+    Returns:
+        Callable: The wrapped method with scripted instrumentation.
+    """
+    history_keys = _history_keys(method.__qualname__)
+
+    def run(self, key, data):
+        keys, args = _script_params(history_keys, [key], [data])
+        return self._store_script(keys=keys, args=args)
+
+    if inspect.iscoroutinefunction(method):
+        @wraps(method)
+        async def async_wrapper(self, data):
+            key = await method(self, data)
+            while await run(self, key, data) is None:
+                key = await method(self, data)
+            _L1.discard(history_keys[0])
+            return key
+        return async_wrapper
+
+    @wraps(method)
+    def wrapper(self, data):
+        key = method(self, data)
+        while run(self, key, data) is None:
+            key = method(self, data)
+        _L1.discard(history_keys[0])
+        return key
+    return wrapper
+
+
 class Cache:
     """
     A Cache class to interact with a Redis database.
 
     Attributes:
         _redis (redis.Redis): Instance of Redis client.
+        _store_script (redis.commands.core.Script): Fused store script.
+        _store_keys (Tuple[bytes, bytes, bytes]): History keys of store.
+        _l1 (_ClockCache): Process-wide read cache, or a disabled one.
     """
-    def __init__(self):
+    def __init__(self, l1: bool = False):
+        """
+        Initializes the Cache class on the shared connection pool.
+
+        Args:
+            l1 (bool): Whether get reads through the process-wide read
+                cache. It only sees the writes of store, store_many and
+                reset in this process: keys changed, deleted, expired or
+                evicted by anything else keep serving their cached value.
+        """
+        self._redis = redis.Redis(connection_pool=_POOL)
+        self._l1 = _L1 if l1 else _NO_L1
+        self._store_script = self._redis.register_script(_STORE_SCRIPT)
+
+    def reset(self) -> None:
         """
-        Initializes the Cache class and flushes the Redis database.
+        Flushes the Redis database.
         """
-        self._redis = redis.Redis()
         self._redis.flushdb()
+        _L1.clear()
 
-    @count_calls
-    @call_history
+    def evict_lru(self) -> None:
+        """
+        Sets the server maxmemory-policy to allkeys-lru. This is a
+        server-wide setting, to be applied once rather than per Cache.
+        Redis must run with a --maxmemory limit for it to take effect.
+        """
+        self._redis.config_set("maxmemory-policy", "allkeys-lru")
+
+    @instrumented_store
     def store(self, data: Union[str, bytes, int, float]) -> str:
         """
         Stores data in Redis with a randomly generated key.
 
+        The key is generated client-side; instrumented_store writes
+        the data and the call history in a single scripted round-trip.
+
         Args:
             data (Union[str, bytes, int, float]): Data to store in Redis.
 
         Returns:
             str: The generated key under which the data is stored.
         """
-        key = str(uuid.uuid4())
-        self._redis.set(key, data)
+        key = os.urandom(8).hex()
         return key
 
+    _store_keys = _history_keys(store.__qualname__)
+
+    def store_many(
+            self, items: List[Union[str, bytes, int, float]]
+            ) -> List[str]:
+        """
+        Stores several items in Redis with one call of the store script,
+        a single EVALSHA round-trip once the script is cached. Each item
+        is counted and recorded, in order, in the history of store. If
+        any key already exists nothing is written and all keys are
+        drawn again.
+
+        Args:
+            items (List[Union[str, bytes, int, float]]): Data to store.
+
+        Returns:
+            List[str]: The generated keys, in the order of items.
+        """
+        if not items:
+            return []
+        while True:
+            keys = _draw_keys(len(items))
+            script_keys, args = _script_params(self._store_keys, keys, items)
+            if self._store_script(keys=script_keys, args=args):
+                break
+        _L1.discard(self._store_keys[0])
+        return keys
+
     def get(
-            self, key: str, fn: Optional[Callable] = None
+            self, key: str, fn: Callable = _identity
             ) -> Union[str, bytes, int, float, None]:
         """
         Retrieves data from Redis and applies an optional conversion function.
 
         Args:
             key (str): The key under which the data is stored.
-            fn (Optional[Callable]): A callable to convert the data.
+            fn (Callable): A callable to convert the data; the
+                default returns the bytes unchanged.
 
         Returns:
             Union[str, bytes, int, float, None]: The retrieved data or
             None if the key does not exist.
         """
-        data = self._redis.get(key)
+        data = self._l1.get(key)
         if data is None:
-            return None
-        if fn:
-            return fn(data)
-        return data
+            generation = self._l1.generation()
+            data = self._redis.get(key)
+            if data is not None:
+                self._l1.put(key, data, generation)
+        return None if data is None else fn(data)
 
     def get_str(self, key: str) -> Optional[str]:
         """
@@ -111,7 +562,7 @@ class Cache:
             Optional[str]: The retrieved string or None if
             the key does not exist.
         """
-        return self.get(key, fn=lambda d: d.decode("utf-8"))
+        return self.get(key, fn=_DECODE_UTF8)
 
     def get_int(self, key: str) -> Optional[int]:
         """
@@ -130,25 +581,207 @@ class Cache:
 def replay(method: Callable):
     """
     Displays the history of calls of a particular function.
+    The history lists are fetched in windows of _REPLAY_CHUNK entries,
+    each window written to stdout in a single call.
 
     Args:
         method (Callable): The function to replay the history of calls.
     """
     cache = method.__self__
-    inputs_key = f"{method.__qualname__}:inputs"
-    outputs_key = f"{method.__qualname__}:outputs"
-    inputs = cache._redis.lrange(inputs_key, 0, -1)
-    outputs = cache._redis.lrange(outputs_key, 0, -1)
-    print(f"{method.__qualname__} was called {len(inputs)} times:")
-    for inp, out in zip(inputs, outputs):
-        inp_str = inp.decode('utf-8')
-        out_str = out.decode('utf-8')
-        print(f"{method.__qualname__}(*{inp_str}) -> {out_str}")
+    qualname = method.__qualname__
+    _, inputs_key, outputs_key = _history_keys(qualname)
+    start = 0
+    pipe = cache._redis.pipeline(transaction=False)
+    pipe.llen(inputs_key)
+    _queue_window(pipe, inputs_key, outputs_key, start)
+    count, inputs, outputs = pipe.execute()
+    text = f"{qualname} was called {count} times:\n"
+    while inputs:
+        sys.stdout.write(text + _format_window(qualname, inputs, outputs))
+        text = ""
+        start += _REPLAY_CHUNK
+        _queue_window(pipe, inputs_key, outputs_key, start)
+        inputs, outputs = pipe.execute()
+    if text:
+        sys.stdout.write(text)
+
+
+class AsyncCache:
+    """
+    An asyncio Cache class sharing a module-level connection pool.
+
+    Attributes:
+        _redis (redis.asyncio.Redis): Instance of async Redis client.
+        _store_script (redis.commands.core.AsyncScript): Fused store script.
+        _store_keys (Tuple[bytes, bytes, bytes]): History keys of store.
+        _l1 (_ClockCache): Process-wide read cache, or a disabled one.
+    """
+    def __init__(self, l1: bool = False):
+        """
+        Initializes the AsyncCache class on the shared connection pool.
+        The database is not flushed here; await reset() to do so.
+
+        Args:
+            l1 (bool): Whether get reads through the process-wide read
+                cache, with the same staleness as Cache's.
+        """
+        self._redis = aioredis.Redis(connection_pool=_ASYNC_POOL)
+        self._l1 = _L1 if l1 else _NO_L1
+        self._store_script = self._redis.register_script(_STORE_SCRIPT)
+
+    async def reset(self) -> None:
+        """
+        Flushes the Redis database.
+        """
+        await self._redis.flushdb()
+        _L1.clear()
+
+    async def evict_lru(self) -> None:
+        """
+        Sets the server maxmemory-policy to allkeys-lru. This is a
+        server-wide setting, to be applied once rather than per Cache.
+        Redis must run with a --maxmemory limit for it to take effect.
+        """
+        await self._redis.config_set("maxmemory-policy", "allkeys-lru")
+
+    @instrumented_store
+    async def store(self, data: Union[str, bytes, int, float]) -> str:
+        """
+        Stores data in Redis with a randomly generated key.
+
+        Args:
+            data (Union[str, bytes, int, float]): Data to store in Redis.
+
+        Returns:
+            str: The generated key under which the data is stored.
+        """
+        key = os.urandom(8).hex()
+        return key
+
+    _store_keys = _history_keys(store.__qualname__)
+
+    async def store_many(
+            self, items: List[Union[str, bytes, int, float]]
+            ) -> List[str]:
+        """
+        Stores several items in Redis with one call of the store script,
+        a single EVALSHA round-trip once the script is cached. Each item
+        is counted and recorded, in order, in the history of store. If
+        any key already exists nothing is written and all keys are
+        drawn again.
+
+        Args:
+            items (List[Union[str, bytes, int, float]]): Data to store.
+
+        Returns:
+            List[str]: The generated keys, in the order of items.
+        """
+        if not items:
+            return []
+        while True:
+            keys = _draw_keys(len(items))
+            script_keys, args = _script_params(self._store_keys, keys, items)
+            if await self._store_script(keys=script_keys, args=args):
+                break
+        _L1.discard(self._store_keys[0])
+        return keys
+
+    async def get(
+            self, key: str, fn: Callable = _identity
+            ) -> Union[str, bytes, int, float, None]:
+        """
+        Retrieves data from Redis and applies an optional conversion function.
+
+        Args:
+            key (str): The key under which the data is stored.
+            fn (Callable): A callable to convert the data; the
+                default returns the bytes unchanged.
+
+        Returns:
+            Union[str, bytes, int, float, None]: The retrieved data or
+            None if the key does not exist.
+        """
+        data = self._l1.get(key)
+        if data is None:
+            generation = self._l1.generation()
+            data = await self._redis.get(key)
+            if data is not None:
+                self._l1.put(key, data, generation)
+        return None if data is None else fn(data)
+
+    async def get_str(self, key: str) -> Optional[str]:
+        """
+        Retrieves a string from Redis.
+
+        Args:
+            key (str): The key under which the data is stored.
+
+        Returns:
+            Optional[str]: The retrieved string or None if
+            the key does not exist.
+        """
+        return await self.get(key, fn=_DECODE_UTF8)
+
+    async def get_int(self, key: str) -> Optional[int]:
+        """
+        Retrieves an integer from Redis.
+
+        Args:
+            key (str): The key under which the data is stored.
+
+        Returns:
+            Optional[int]: The retrieved integer or None if the
+            key does not exist.
+        """
+        return await self.get(key, fn=int)
+
+
+async def async_replay(method: Callable):
+    """
+    Displays the history of calls of a particular AsyncCache method.
+    The history lists are fetched in windows of _REPLAY_CHUNK entries,
+    each window written to stdout in a single call.
+
+    Args:
+        method (Callable): The coroutine method to replay the history of.
+    """
+    cache = method.__self__
+    qualname = method.__qualname__
+    _, inputs_key, outputs_key = _history_keys(qualname)
+    start = 0
+    pipe = cache._redis.pipeline(transaction=False)
+    pipe.llen(inputs_key)
+    _queue_window(pipe, inputs_key, outputs_key, start)
+    count, inputs, outputs = await pipe.execute()
+    text = f"{qualname} was called {count} times:\n"
+    while inputs:
+        sys.stdout.write(text + _format_window(qualname, inputs, outputs))
+        text = ""
+        start += _REPLAY_CHUNK
+        _queue_window(pipe, inputs_key, outputs_key, start)
+        inputs, outputs = await pipe.execute()
+    if text:
+        sys.stdout.write(text)
+
+
+async def shutdown() -> None:
+    """
+    Disconnects every connection of the shared async pool.
+    """
+    await _ASYNC_POOL.disconnect()
 
 
 if __name__ == "__main__":
-    cache = Cache()
-    cache.store("foo")
-    cache.store("bar")
-    cache.store(42)
-    replay(cache.store)
+    async def main():
+        """
+        Stores a few values in one round-trip and replays the calls.
+        """
+        cache = AsyncCache()
+        try:
+            await cache.reset()
+            await cache.store_many(["foo", "bar", 42])
+            await async_replay(cache.store)
+        finally:
+            await shutdown()
+
+    asyncio.run(main())
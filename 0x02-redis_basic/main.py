@@ -2,15 +2,23 @@
 """
 Main file
 """
-import redis
+import asyncio
 
-Cache = __import__('exercise').Cache
+exercise = __import__('exercise')
 
-cache = Cache()
 
-data = b"hello"
-key = cache.store(data)
-print(key)
+async def main():
+    """
+    Stores a value and reads it back from the server, bypassing
+    the read cache.
+    """
+    cache = exercise.AsyncCache()
+    try:
+        data = b"hello"
+        key = await cache.store(data)
+        print(key)
+        print(await cache._redis.get(key))
+    finally:
+        await exercise.shutdown()
 
-local_redis = redis.Redis()
-print(local_redis.get(key))
+asyncio.run(main())